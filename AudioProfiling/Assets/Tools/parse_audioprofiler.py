@@ -4,11 +4,46 @@ Audio Profiler Parser
 Analyzes Unity FMOD audio performance metrics and validates against thresholds.
 """
 
+import array
+import codecs
+import functools
 import json
 import sys
 import statistics
+from itertools import chain, dropwhile
+from operator import itemgetter, pos
 from pathlib import Path
-from typing import Dict, List, Any, Optional
+from typing import BinaryIO, Dict, Iterable, Iterator, List, Any, Optional, Sequence, Tuple
+
+# orjson parses/serializes several times faster than the stdlib; keep it optional
+try:
+    import orjson
+
+    _loads = orjson.loads
+
+    def _dumps(obj: Any) -> bytes:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+except ImportError:
+    _loads = json.loads
+
+    def _dumps(obj: Any) -> bytes:
+        return json.dumps(obj, indent=2).encode("utf-8")
+
+# NumPy is optional too; without it statistics fall back to pure Python
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# ijson lets large captures be streamed instead of loaded whole
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+# Files larger than this are streamed when ijson is available; below it the
+# one-shot parser is faster than ijson's event loop
+STREAM_THRESHOLD_BYTES = 10 * 1024 * 1024
 
 # ----------------------------
 # Default Thresholds
@@ -34,36 +69,155 @@ DEFAULT_THRESHOLDS = {
     }
 }
 
+# (statistic name, profiler sample field, value type), in report order
+SAMPLE_FIELDS = (
+    ("fmod_cpu_dsp", "fmodCpuDsp", float),
+    ("fmod_cpu_stream", "fmodCpuStream", float),
+    ("fmod_cpu_update", "fmodCpuUpdate", float),
+    ("fmod_cpu_total", "totalFmodCpu", float),
+    ("voices", "voices", int),
+    ("unity_frame_ms", "unityFrameMs", float),
+)
+
+SAMPLE_DEFAULTS = {key: 0 for _, key, _ in SAMPLE_FIELDS}
+get_sample_fields = itemgetter(*SAMPLE_DEFAULTS)
+
+# (label, stats key, statistic, threshold path, default, severity)
+THRESHOLD_CHECKS = (
+    ("FMOD DSP CPU", "fmod_cpu_dsp", "max", ("fmod", "cpu", "dsp", "max"), 20.0, "error"),
+    ("FMOD DSP CPU", "fmod_cpu_dsp", "avg", ("fmod", "cpu", "dsp", "avg"), 10.0, "error"),
+    ("FMOD Stream CPU", "fmod_cpu_stream", "avg", ("fmod", "cpu", "stream", "avg"), 2.0, "error"),
+    ("FMOD Total CPU", "fmod_cpu_total", "max", ("fmod", "cpu", "total", "max"), 25.0, "error"),
+    ("Voices", "voices", "avg", ("fmod", "voices", "avg"), 32, "warning"),
+    ("Voices", "voices", "max", ("fmod", "voices", "max"), 64, "error"),
+    ("Frame ms", "unity_frame_ms", "avg", ("unity", "frame_ms", "avg"), 16.6, "warning"),
+    ("Frame ms", "unity_frame_ms", "max", ("unity", "frame_ms", "max"), 33.0, "error"),
+)
+
+# Top-level profiler fields reported as metadata
+METADATA_FIELDS = (
+    "timestamp",
+    "unityVersion",
+    "platform",
+    "sampleCount",
+    "totalDuration",
+    "samplingInterval",
+)
+
+METADATA_KEYS = frozenset(METADATA_FIELDS)
+
+# ijson events that carry a JSON scalar value
+SCALAR_EVENTS = frozenset(("string", "number", "boolean", "null"))
+
 # ----------------------------
 # Helpers
 # ----------------------------
 
+class ProfilerError(Exception):
+    """Raised when profiler output or thresholds cannot be loaded or processed."""
+
+
 def load_json(path: Path) -> Dict[str, Any]:
-    """Load and parse JSON file with error handling."""
+    """Load and parse JSON file, raising ProfilerError on failure."""
     if not path.exists():
-        print(f"[ERROR] File not found: {path}")
-        sys.exit(1)
+        raise ProfilerError(f"File not found: {path}")
     
     try:
-        with path.open("r", encoding="utf-8") as f:
-            return json.load(f)
+        # Parse raw bytes: both backends decode UTF-8 in C, skipping a
+        # separate str decode pass. orjson rejects a BOM, so drop it here
+        data = path.read_bytes()
+        if data.startswith(codecs.BOM_UTF8):
+            data = data[len(codecs.BOM_UTF8):]
+        return _loads(data)
     except json.JSONDecodeError as e:
-        print(f"[ERROR] Invalid JSON in {path}: {e}")
-        sys.exit(1)
+        raise ProfilerError(f"Invalid JSON in {path}: {e}") from e
     except Exception as e:
-        print(f"[ERROR] Failed to read {path}: {e}")
-        sys.exit(1)
+        raise ProfilerError(f"Failed to read {path}: {e}") from e
+
+
+def open_json(path: Path) -> BinaryIO:
+    """Open a JSON file for streaming, positioned after any UTF-8 BOM."""
+    f = path.open("rb")
+    if f.read(len(codecs.BOM_UTF8)) != codecs.BOM_UTF8:
+        f.seek(0)
+    return f
+
+
+def stream_metadata(path: Path) -> Dict[str, Any]:
+    """Collect the top-level metadata fields, wherever they sit in the capture."""
+    metadata = {}
+    with open_json(path) as f:
+        events = ijson.parse(f, use_float=True)
+        if next(events, (None, None, None))[1] != "start_map":
+            return metadata
+        while len(metadata) < len(METADATA_FIELDS):
+            _, event, key = next(events, (None, "end_map", None))
+            if event != "map_key":
+                break
+            _, event, value = next(events)
+            if key not in METADATA_KEYS:
+                if event in ("start_map", "start_array"):
+                    # Skip the value (e.g. samples) in C: every event inside
+                    # it has a non-empty prefix, top-level events do not
+                    events = dropwhile(itemgetter(0), events)
+            elif event in SCALAR_EVENTS:
+                metadata[key] = value
+            else:
+                builder = ijson.ObjectBuilder()
+                builder.event(event, value)
+                for prefix, event, value in events:
+                    builder.event(event, value)
+                    if prefix == key and event in ("end_map", "end_array"):
+                        break
+                metadata[key] = builder.value
+    return metadata
+
+
+def stream_columns(path: Path) -> List[array.array]:
+    """Stream samples into one float64 array per SAMPLE_FIELDS entry."""
+    # ijson.items builds each sample in C and array.extend consumes the rows
+    # without a Python-level loop; it rejects null, strings and nested values
+    flat = array.array("d")
+    try:
+        with open_json(path) as f:
+            flat.extend(chain.from_iterable(sample_rows(ijson.items(f, "samples.item", use_float=True))))
+    except KeyError:
+        flat = array.array("d")
+        with open_json(path) as f:
+            flat.extend(chain.from_iterable(
+                sample_rows(ijson.items(f, "samples.item", use_float=True), fill_missing=True)
+            ))
+    k = len(SAMPLE_FIELDS)
+    return [flat[i::k] for i in range(k)]
+
+
+def stream_profile(path: Path) -> Tuple[Dict[str, Any], List[array.array]]:
+    """Stream a capture into its metadata and per-field sample arrays."""
+    return stream_metadata(path), stream_columns(path)
+
+
+@functools.lru_cache(maxsize=4)
+def read_thresholds_file(path: Path, mtime_ns: int) -> Dict[str, Any]:
+    """Parse a thresholds file, caching successful loads per path and mtime."""
+    # mtime_ns is only part of the cache key, so an edited file is re-read
+    return load_json(path)
 
 
 def load_thresholds(script_dir: Path) -> Dict[str, Any]:
-    """Load thresholds from file or use defaults."""
+    """Load thresholds from file or use defaults.
+
+    The returned dict is shared between calls and must be treated as
+    read-only. Parsed files are cached until they change on disk; failed
+    loads are not cached.
+    """
     thresholds_path = script_dir / "audio_thresholds.json"
     
     if thresholds_path.exists():
         print(f"[INFO] Loading thresholds from: {thresholds_path}")
         try:
-            return load_json(thresholds_path)
-        except:
+            return read_thresholds_file(thresholds_path, thresholds_path.stat().st_mtime_ns)
+        except (ProfilerError, OSError) as e:
+            print(f"[ERROR] {e}")
             print("[WARNING] Failed to load thresholds file, using defaults")
             return DEFAULT_THRESHOLDS
     else:
@@ -72,30 +226,137 @@ def load_thresholds(script_dir: Path) -> Dict[str, Any]:
         return DEFAULT_THRESHOLDS
 
 
-def calculate_stats(values: List[float]) -> Dict[str, float]:
+def sample_rows(samples: Iterable[Dict[str, Any]], fill_missing: bool = False) -> Iterator[Tuple]:
+    """Yield one tuple of SAMPLE_FIELDS values per sample."""
+    if fill_missing:
+        # Some captures omit fields; treat missing values as 0
+        return (get_sample_fields({**SAMPLE_DEFAULTS, **s}) for s in samples)
+    return map(get_sample_fields, samples)
+
+
+def extract_columns(samples: List[Dict[str, Any]]) -> List[Tuple[float, ...]]:
+    """Transpose samples into one tuple of values per SAMPLE_FIELDS entry."""
+    try:
+        return list(zip(*sample_rows(samples)))
+    except KeyError:
+        return list(zip(*sample_rows(samples, fill_missing=True)))
+
+
+def extract_matrix(samples: List[Dict[str, Any]]) -> "np.ndarray":
+    """Fill a preallocated (samples, fields) float64 array in one pass."""
+    shape = (len(samples), len(SAMPLE_FIELDS))
+    # np.fromiter would turn null into NaN and parse numeric strings; unary +
+    # rejects both in C, matching the streaming and pure-Python paths
+    try:
+        flat = np.fromiter(
+            map(pos, chain.from_iterable(sample_rows(samples))),
+            dtype=np.float64,
+            count=shape[0] * shape[1]
+        )
+    except KeyError:
+        flat = np.fromiter(
+            map(pos, chain.from_iterable(sample_rows(samples, fill_missing=True))),
+            dtype=np.float64,
+            count=shape[0] * shape[1]
+        )
+    return flat.reshape(shape)
+
+
+def calculate_stats(values: Sequence[float]) -> Dict[str, float]:
     """Calculate min, max, avg, and percentiles for a list of values."""
     if not values:
         return {"min": 0, "max": 0, "avg": 0, "p95": 0, "p99": 0}
     
+    n = len(values)
     sorted_values = sorted(values)
+    # Integer counts (voices) sum exactly, so skip statistics.mean's
+    # per-value type inspection and use the C-level builtins
+    if isinstance(values[0], int):
+        avg = sum(values) / n
+    else:
+        avg = statistics.mean(values)
+    mid = n // 2
+    if n % 2:
+        median = sorted_values[mid]
+    else:
+        median = (sorted_values[mid - 1] + sorted_values[mid]) / 2
     return {
-        "min": min(values),
-        "max": max(values),
-        "avg": statistics.mean(values),
-        "median": statistics.median(values),
-        "p95": sorted_values[int(len(sorted_values) * 0.95)] if len(sorted_values) > 0 else 0,
-        "p99": sorted_values[int(len(sorted_values) * 0.99)] if len(sorted_values) > 0 else 0
+        "min": sorted_values[0],
+        "max": sorted_values[-1],
+        "avg": avg,
+        "median": median,
+        "p95": sorted_values[int(n * 0.95)],
+        "p99": sorted_values[int(n * 0.99)]
     }
 
 
-def safe_get(data: Dict, *keys, default=0):
-    """Safely get nested dictionary values."""
-    for key in keys:
-        if isinstance(data, dict):
-            data = data.get(key, default)
-        else:
-            return default
-    return data
+def is_integral(values: "np.ndarray", axis: Optional[int] = None):
+    """Return whether every value is a whole number, optionally per axis."""
+    return (values == np.floor(values)).all(axis=axis)
+
+
+def select_ranks(values: "np.ndarray") -> Tuple["np.ndarray", "np.ndarray", "np.ndarray"]:
+    """Return median, p95 and p99 along the last axis of a non-empty array."""
+    # Only the median and percentile ranks need to be in place, so a single
+    # O(N) partition replaces the full sort
+    n = values.shape[-1]
+    mid = n // 2
+    k95 = int(n * 0.95)
+    k99 = int(n * 0.99)
+    kth = [mid, k95, k99] if n % 2 else [mid - 1, mid, k95, k99]
+    part = np.partition(values, kth, axis=-1)
+    if n % 2:
+        median = part[..., mid]
+    else:
+        median = (part[..., mid - 1] + part[..., mid]) / 2
+    return median, part[..., k95], part[..., k99]
+
+
+def calculate_stats_batch(data: "np.ndarray") -> Dict[str, Dict[str, float]]:
+    """Calculate statistics for every SAMPLE_FIELDS row of a (fields, samples) array."""
+    n = data.shape[1]
+    if n == 0:
+        return {name: calculate_stats([]) for name, _, _ in SAMPLE_FIELDS}
+    
+    # One contiguous row per field keeps each reduction and the shared
+    # partition running over sequential memory
+    columns = np.ascontiguousarray(data)
+    medians, p95s, p99s = select_ranks(columns)
+    integral = is_integral(columns, axis=1).tolist()
+    
+    mins = columns.min(axis=1).tolist()
+    maxs = columns.max(axis=1).tolist()
+    means = columns.mean(axis=1).tolist()
+    medians = medians.tolist()
+    p95s = p95s.tolist()
+    p99s = p99s.tolist()
+    
+    stats = {}
+    for i, (name, _, kind) in enumerate(SAMPLE_FIELDS):
+        # Whole-number integer fields report int order statistics, matching
+        # calculate_stats on int values
+        cast = int if kind is int and integral[i] else float
+        stats[name] = {
+            "min": cast(mins[i]),
+            "max": cast(maxs[i]),
+            "avg": means[i],
+            "median": cast(medians[i]) if n % 2 else medians[i],
+            "p95": cast(p95s[i]),
+            "p99": cast(p99s[i])
+        }
+    return stats
+
+
+def summarize_columns(columns: Sequence[Sequence[float]]) -> Dict[str, Dict[str, float]]:
+    """Calculate statistics for per-field columns given in SAMPLE_FIELDS order."""
+    stats = {}
+    for (name, _, kind), column in zip(SAMPLE_FIELDS, columns):
+        # Streamed columns are float64; whole-number counts go back to int
+        # like the in-memory path
+        if kind is int and isinstance(column, array.array) and all(map(float.is_integer, column)):
+            column = list(map(int, column))
+        stats[name] = calculate_stats(column)
+    return stats
 
 
 # ----------------------------
@@ -121,88 +382,28 @@ class ValidationResult:
         return len(self.errors) > 0
 
 
-def check_threshold(
-    name: str,
-    value: float,
-    threshold: float,
-    stat_type: str,
-    result: ValidationResult
-):
-    """Check if a value exceeds a threshold."""
-    if value > threshold:
-        result.add_error(f"{name} {stat_type} {value:.2f} > {threshold:.2f}")
-    else:
-        result.add_info(f"{name} {stat_type} {value:.2f} <= {threshold:.2f} ✓")
+def get_threshold(thresholds: Dict, path: Tuple[str, ...], default: float) -> float:
+    """Look up a nested threshold value, falling back to a default."""
+    node = thresholds
+    for key in path:
+        if not isinstance(node, dict) or key not in node:
+            return default
+        node = node[key]
+    return node
 
 
 def validate_metrics(stats: Dict[str, Dict], thresholds: Dict) -> ValidationResult:
     """Validate collected metrics against thresholds."""
     result = ValidationResult()
     
-    # FMOD CPU checks
-    fmod_thresholds = thresholds.get("fmod", {}).get("cpu", {})
-    
-    check_threshold(
-        "FMOD DSP CPU",
-        stats["fmod_cpu_dsp"]["max"],
-        safe_get(fmod_thresholds, "dsp", "max", default=20.0),
-        "max",
-        result
-    )
-    
-    check_threshold(
-        "FMOD DSP CPU",
-        stats["fmod_cpu_dsp"]["avg"],
-        safe_get(fmod_thresholds, "dsp", "avg", default=10.0),
-        "avg",
-        result
-    )
-    
-    check_threshold(
-        "FMOD Stream CPU",
-        stats["fmod_cpu_stream"]["avg"],
-        safe_get(fmod_thresholds, "stream", "avg", default=2.0),
-        "avg",
-        result
-    )
-    
-    check_threshold(
-        "FMOD Total CPU",
-        stats["fmod_cpu_total"]["max"],
-        safe_get(fmod_thresholds, "total", "max", default=25.0),
-        "max",
-        result
-    )
-    
-    # Voice checks
-    voices_thresholds = thresholds.get("fmod", {}).get("voices", {})
-    
-    avg_threshold = voices_thresholds.get("avg", 32)
-    if stats["voices"]["avg"] > avg_threshold:
-        result.add_warning(
-            f"Voices avg {stats['voices']['avg']:.1f} > {avg_threshold}"
-        )
-    
-    max_threshold = voices_thresholds.get("max", 64)
-    if stats["voices"]["max"] > max_threshold:
-        result.add_error(
-            f"Voices max {stats['voices']['max']} > {max_threshold}"
-        )
-    
-    # Unity frame time checks
-    frame_thresholds = thresholds.get("unity", {}).get("frame_ms", {})
-    
-    avg_threshold = frame_thresholds.get("avg", 16.6)
-    if stats["unity_frame_ms"]["avg"] > avg_threshold:
-        result.add_warning(
-            f"Frame avg {stats['unity_frame_ms']['avg']:.2f}ms > {avg_threshold}ms"
-        )
-    
-    max_threshold = frame_thresholds.get("max", 33.0)
-    if stats["unity_frame_ms"]["max"] > max_threshold:
-        result.add_error(
-            f"Frame max {stats['unity_frame_ms']['max']:.2f}ms > {max_threshold}ms"
-        )
+    for name, stats_key, stat_type, path, default, severity in THRESHOLD_CHECKS:
+        value = stats[stats_key][stat_type]
+        threshold = get_threshold(thresholds, path, default)
+        if value > threshold:
+            report = result.add_error if severity == "error" else result.add_warning
+            report(f"{name} {stat_type} {value:.2f} > {threshold:.2f}")
+        else:
+            result.add_info(f"{name} {stat_type} {value:.2f} <= {threshold:.2f} ✓")
     
     return result
 
@@ -226,110 +427,106 @@ def generate_report(stats: Dict, metadata: Dict, result: ValidationResult) -> Di
 
 def print_report(stats: Dict, metadata: Dict, result: ValidationResult):
     """Print human-readable report to console."""
-    print("\n" + "="*60)
-    print("AUDIO PERFORMANCE REPORT")
-    print("="*60)
+    # Collect every line first so the report goes out in a single write
+    out = ["", "="*60, "AUDIO PERFORMANCE REPORT", "="*60]
     
     # Metadata
     if metadata:
-        print("\n[METADATA]")
-        for key, value in metadata.items():
-            print(f"  {key}: {value}")
+        out.append("\n[METADATA]")
+        out.extend(f"  {key}: {value}" for key, value in metadata.items())
     
     # Statistics
-    print("\n[STATISTICS]")
+    out.append("\n[STATISTICS]")
     for name, values in stats.items():
-        print(f"\n{name}:")
-        for stat, val in values.items():
-            if isinstance(val, float):
-                print(f"  {stat}: {val:.2f}")
-            else:
-                print(f"  {stat}: {val}")
+        out.append(f"\n{name}:")
+        out.extend(
+            f"  {stat}: {val:.2f}" if isinstance(val, float) else f"  {stat}: {val}"
+            for stat, val in values.items()
+        )
     
     # Validation results
     if result.info:
-        print("\n[CHECKS PASSED]")
-        for msg in result.info:
-            print(f"  ✓ {msg}")
+        out.append("\n[CHECKS PASSED]")
+        out.extend(f"  ✓ {msg}" for msg in result.info)
     
     if result.warnings:
-        print("\n[WARNINGS]")
-        for msg in result.warnings:
-            print(f"  ⚠ {msg}")
+        out.append("\n[WARNINGS]")
+        out.extend(f"  ⚠ {msg}" for msg in result.warnings)
     
     if result.errors:
-        print("\n[FAILURES]")
-        for msg in result.errors:
-            print(f"  ✗ {msg}")
+        out.append("\n[FAILURES]")
+        out.extend(f"  ✗ {msg}" for msg in result.errors)
     
     # Final verdict
-    print("\n" + "="*60)
+    out.append("\n" + "="*60)
     if result.has_failures():
-        print("RESULT: FAIL ❌")
-        print("="*60)
+        out.append("RESULT: FAIL ❌")
     else:
-        print("RESULT: PASS ✅")
-        print("="*60)
+        out.append("RESULT: PASS ✅")
+    out.append("="*60)
+    
+    sys.stdout.write("\n".join(out) + "\n")
 
 
 # ----------------------------
 # Main Entry Point
 # ----------------------------
 
-def main():
-    if len(sys.argv) < 2:
-        print("Usage: python parse_audioprofiler.py <profiler_output.json>")
-        print("\nOptional: Create audio_thresholds.json in the same directory")
-        print("to customize performance thresholds.")
-        sys.exit(1)
+def run(metrics_path: Path, script_dir: Path) -> int:
+    """Analyze one profiler capture and return the process exit code.
 
-    metrics_path = Path(sys.argv[1])
-    script_dir = Path(__file__).parent
-    
-    # Load data
+    Raises ProfilerError if the capture cannot be loaded or processed.
+    """
+    # Load data; large captures are streamed to keep memory flat
     print(f"[INFO] Loading metrics from: {metrics_path}")
-    metrics = load_json(metrics_path)
+    streaming = (
+        ijson is not None
+        and metrics_path.is_file()
+        and metrics_path.stat().st_size > STREAM_THRESHOLD_BYTES
+    )
+    if streaming:
+        try:
+            metrics, columns = stream_profile(metrics_path)
+        except ijson.JSONError as e:
+            raise ProfilerError(f"Invalid JSON in {metrics_path}: {e}") from e
+        except (TypeError, ValueError) as e:
+            raise ProfilerError(f"Invalid sample data in profiler output: {e}") from e
+        except OSError as e:
+            raise ProfilerError(f"Failed to read {metrics_path}: {e}") from e
+        sample_count = len(columns[0])
+    else:
+        metrics = load_json(metrics_path)
+        if not isinstance(metrics, dict):
+            raise ProfilerError(f"Expected a JSON object in {metrics_path}, got {type(metrics).__name__}")
+        samples = metrics.get("samples", [])
+        sample_count = len(samples)
     thresholds = load_thresholds(script_dir)
     
     # Extract samples
-    samples = metrics.get("samples", [])
-    if not samples:
-        print("[ERROR] No samples found in profiler output.")
-        sys.exit(1)
+    if not sample_count:
+        raise ProfilerError("No samples found in profiler output.")
     
-    print(f"[INFO] Processing {len(samples)} samples...")
+    print(f"[INFO] Processing {sample_count} samples...")
     
     # Extract metadata
     metadata = {
         "timestamp": metrics.get("timestamp", "unknown"),
         "unity_version": metrics.get("unityVersion", "unknown"),
         "platform": metrics.get("platform", "unknown"),
-        "sample_count": metrics.get("sampleCount", len(samples)),
+        "sample_count": metrics.get("sampleCount", sample_count),
         "total_duration": metrics.get("totalDuration", 0),
         "sampling_interval": metrics.get("samplingInterval", 1)
     }
     
-    # Collect metrics
+    # Collect metrics and calculate statistics
     try:
-        dsp_cpu = [s.get("fmodCpuDsp", 0) for s in samples]
-        stream_cpu = [s.get("fmodCpuStream", 0) for s in samples]
-        update_cpu = [s.get("fmodCpuUpdate", 0) for s in samples]
-        total_cpu = [s.get("totalFmodCpu", 0) for s in samples]
-        voices = [s.get("voices", 0) for s in samples]
-        frame_ms = [s.get("unityFrameMs", 0) for s in samples]
-    except KeyError as e:
-        print(f"[ERROR] Missing expected field in samples: {e}")
-        sys.exit(1)
-    
-    # Calculate statistics
-    stats = {
-        "fmod_cpu_dsp": calculate_stats(dsp_cpu),
-        "fmod_cpu_stream": calculate_stats(stream_cpu),
-        "fmod_cpu_update": calculate_stats(update_cpu),
-        "fmod_cpu_total": calculate_stats(total_cpu),
-        "voices": calculate_stats(voices),
-        "unity_frame_ms": calculate_stats(frame_ms)
-    }
+        if np is not None:
+            data = np.vstack(columns) if streaming else extract_matrix(samples).T
+            stats = calculate_stats_batch(data)
+        else:
+            stats = summarize_columns(columns if streaming else extract_columns(samples))
+    except (KeyError, TypeError, ValueError) as e:
+        raise ProfilerError(f"Invalid sample data in profiler output: {e}") from e
     
     # Validate
     result = validate_metrics(stats, thresholds)
@@ -342,15 +539,28 @@ def main():
     report_path = Path("report.json")
     
     try:
-        with report_path.open("w", encoding="utf-8") as f:
-            json.dump(report, f, indent=2)
+        report_path.write_bytes(_dumps(report))
         print(f"\n[INFO] Detailed report saved to: {report_path}")
     except Exception as e:
         print(f"[WARNING] Failed to save report.json: {e}")
     
-    # Exit with appropriate code
-    sys.exit(1 if result.has_failures() else 0)
+    return 1 if result.has_failures() else 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = sys.argv[1:] if argv is None else argv
+    if not args:
+        print("Usage: python parse_audioprofiler.py <profiler_output.json>")
+        print("\nOptional: Create audio_thresholds.json in the same directory")
+        print("to customize performance thresholds.")
+        return 1
+
+    try:
+        return run(Path(args[0]), Path(__file__).parent)
+    except ProfilerError as e:
+        print(f"[ERROR] {e}")
+        return 1
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())